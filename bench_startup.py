@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for monitor.py
+
+Measures, each in a fresh interpreter:
+  1. import time of the modules monitor.py used to load eagerly vs. what it loads now
+  2. time to first paint / first live render of the dashboard script
+     (via streamlit's AppTest, without and with a local snapshot)
+
+Usage:
+  python3 bench_startup.py --runs 5
+"""
+import argparse
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+EAGER_IMPORTS = "import streamlit, streamlit.components.v1, pandas, requests"
+LAZY_IMPORTS = "import streamlit"
+
+IMPORT_SNIPPET = """
+import time
+t = time.perf_counter()
+{imports}
+print((time.perf_counter() - t) * 1000)
+"""
+
+RENDER_SNIPPET = """
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({script!r}, default_timeout={timeout})
+try:
+    at.run()
+except RuntimeError:
+    pass  # monitor.py refreshes forever; the timeout is expected
+"""
+
+STARTUP_RE = re.compile(r"\[startup\] (first paint|live data) (\d+) ms")
+
+
+def time_imports(imports, runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(imports=imports)],
+            capture_output=True, text=True, check=True,
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def time_render(workdir, timeout):
+    """Run monitor.py once in workdir and return {'first paint': ms, 'live data': ms}."""
+    script = os.path.join(workdir, "monitor.py")
+    out = subprocess.run(
+        [sys.executable, "-c", RENDER_SNIPPET.format(script=script, timeout=timeout)],
+        capture_output=True, text=True, cwd=workdir,
+    )
+    return {m.group(1): float(m.group(2)) for m in STARTUP_RE.finditer(out.stdout)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="monitor.py cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Repetitions per measurement (median is reported)")
+    parser.add_argument("--timeout", type=float, default=3, help="Seconds to let each dashboard run go")
+    args = parser.parse_args()
+
+    eager = time_imports(EAGER_IMPORTS, args.runs)
+    lazy = time_imports(LAZY_IMPORTS, args.runs)
+    print(f"import (eager: streamlit+components+pandas+requests): {eager:7.0f} ms")
+    print(f"import (lazy:  streamlit only)                      : {lazy:7.0f} ms")
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    for with_snapshot in (False, True):
+        samples = {"first paint": [], "live data": []}
+        for _ in range(args.runs):
+            workdir = tempfile.mkdtemp(prefix="monitor_bench_")
+            try:
+                for name in ("monitor.py", "status_reader.py"):
+                    shutil.copy(os.path.join(here, name), workdir)
+                if with_snapshot:
+                    time_render(workdir, args.timeout)  # 第一次运行写出快照
+                for key, ms in time_render(workdir, args.timeout).items():
+                    samples[key].append(ms)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+        label = "with snapshot   " if with_snapshot else "without snapshot"
+        summary = ", ".join(
+            f"{key} {statistics.median(v):.0f} ms" for key, v in samples.items() if v
+        )
+        print(f"render ({label}): {summary or 'no [startup] output'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,9 @@ from datetime import datetime
 HOSTS = [f"zxcpu{i}" for i in range(1, 6)]
 LOCAL_STATUS_FILE = "status.json"
 NFS_PATH_TEMPLATE = "/export/{host}/junle/monitor/status.json"
+# 采集端写出的降采样历史 (与 status.json 同目录)
+LOCAL_HISTORY_FILE = "history.json"
+NFS_HISTORY_TEMPLATE = "/export/{host}/junle/monitor/history.json"
 
 
 def get_status_file_path(host):
@@ -32,6 +35,17 @@ def get_status_file_path(host):
         return NFS_PATH_TEMPLATE.format(host=host)
 
 
+def get_history_file_path(host):
+    """Get the path to history.json for a given host."""
+    import socket
+    current_host = socket.gethostname()
+
+    if host == current_host:
+        return LOCAL_HISTORY_FILE
+    else:
+        return NFS_HISTORY_TEMPLATE.format(host=host)
+
+
 def read_all_status_files():
     """Read status.json from all servers."""
     all_data = {}
@@ -50,7 +64,30 @@ def read_all_status_files():
     return all_data
 
 
-def update_gist(gist_id, github_token, all_data):
+def read_changed_history_files(last_seen):
+    """Read history.json for hosts whose rollups changed since the last upload.
+
+    last_seen maps host -> history timestamp already uploaded. It is not modified
+    here; the caller records the new timestamps once the upload succeeded.
+    """
+    changed = {}
+
+    for host in HOSTS:
+        file_path = get_history_file_path(host)
+        try:
+            if not os.path.exists(file_path):
+                continue
+            with open(file_path, "r") as f:
+                history = json.load(f)
+        except Exception:
+            continue
+        if history.get("timestamp") != last_seen.get(host):
+            changed[host] = history
+
+    return changed
+
+
+def update_gist(gist_id, github_token, all_data, history_data=None):
     """Update all files in the Gist."""
     url = f"https://api.github.com/gists/{gist_id}"
     headers = {
@@ -63,6 +100,8 @@ def update_gist(gist_id, github_token, all_data):
     for host, data in all_data.items():
         filename = f"{host}.json"
         files[filename] = {"content": json.dumps(data, indent=2)}
+    for host, history in (history_data or {}).items():
+        files[f"{host}_history.json"] = {"content": json.dumps(history, separators=(",", ":"))}
     
     payload = {"files": files}
     
@@ -96,17 +135,23 @@ def main():
     print(f"Monitoring hosts: {', '.join(HOSTS)}")
     print(f"Interval: {args.interval}s")
 
+    history_seen = {}
+
     while True:
         try:
             readable_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             
             # Read all status files
             all_data = read_all_status_files()
+            history_data = read_changed_history_files(history_seen)
             
             # Upload to Gist
-            success = update_gist(args.gist_id, github_token, all_data)
+            success = update_gist(args.gist_id, github_token, all_data, history_data)
             
             if success:
+                # 上传成功后才记录, 失败的历史版本会在下一轮重试
+                for host, history in history_data.items():
+                    history_seen[host] = history.get("timestamp")
                 print(f"[{readable_time}] Updated Gist with {len(all_data)} hosts")
             
         except Exception as e:
@@ -8,11 +8,21 @@ Usage:
 
   # Gist mode (for Streamlit Cloud deployment):
   python3 gpu_collector.py --gist-id YOUR_GIST_ID --github-token YOUR_TOKEN
+
+  # Also record raw samples for replay.py:
+  # (rotated to samples_<host>.jsonl.1.gz on restart and past --record-max-mb,
+  #  so at most ~2x that on disk; the log is always gzip, whatever its name)
+  python3 gpu_collector.py --record samples_$(hostname).jsonl.gz
+
+History rollups (history.json next to status.json) are kept for the dashboard's
+trend charts: 1h @ 15s, 24h @ 5min, 7d @ 30min, i.e. at most ~340 points per chart.
 """
 import subprocess
 import json
+import gzip
 import time
 import os
+import pwd
 import socket
 import argparse
 from datetime import datetime
@@ -24,6 +34,20 @@ try:
 except ImportError:
     HAS_REQUESTS = False
 
+# 与 monitor.py 保持一致: 显存占用低于该值视为空闲
+FREE_MEM_THRESHOLD = 500
+
+# 作业分组时的祖先边界: 这些父进程不会被当作作业的启动进程
+SHELL_COMMS = {"bash", "sh", "zsh", "fish", "dash", "ksh", "tcsh", "csh",
+               "screen", "sshd", "login", "su", "sudo", "systemd", "init"}
+
+# 历史数据分层降采样: 名称 -> (保留时长秒, 桶宽秒)
+HISTORY_TIERS = {
+    "1h": (3600, 15),
+    "24h": (86400, 300),
+    "7d": (604800, 1800),
+}
+
 
 def get_nvidia_smi_data():
     data = {}
@@ -101,7 +125,323 @@ def get_nvidia_smi_data():
     return data
 
 
-def update_gist(gist_id, github_token, hostname, data_json):
+def read_proc_stat(pid):
+    """Return (comm, ppid, pgrp, session, start time in clock ticks) from /proc/<pid>/stat."""
+    with open(f"/proc/{pid}/stat", "r") as f:
+        stat = f.read()
+    # comm 字段可能包含空格和括号, 从最后一个 ')' 之后开始切分
+    comm = stat[stat.find('(') + 1:stat.rfind(')')]
+    fields = stat[stat.rfind(')') + 2:].split()
+    return comm, int(fields[1]), int(fields[2]), int(fields[3]), int(fields[19])
+
+
+def proc_uid(pid):
+    return os.stat(f"/proc/{pid}").st_uid
+
+
+def job_name(pid):
+    """Short job label from the root process command line, e.g. 'torchrun train.py'."""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            argv = [a.decode(errors="replace") for a in f.read().split(b"\0") if a]
+    except OSError:
+        return str(pid)
+    if not argv:
+        return str(pid)
+    name = os.path.basename(argv[0])
+    for arg in argv[1:]:
+        if not arg.startswith("-"):
+            name += " " + os.path.basename(arg)
+            break
+    return name[:80]
+
+
+def boot_time():
+    with open("/proc/stat", "r") as f:
+        for line in f:
+            if line.startswith("btime"):
+                return int(line.split()[1])
+    return 0
+
+
+def resolve_job_root(pid, gpu_pids, cache, seen):
+    """Find the process that launched pid's job from /proc parent / session info.
+
+    If the parent is a GPU process too (mp.spawn: rank 0 is the parent of the
+    other ranks), climb through GPU parents; the topmost one is the root.
+    Otherwise the parent is the job's launcher (torchrun, a launcher script) and
+    becomes the root. A parent never becomes the root if it is a shell / tmux /
+    sshd / init, owned by another user, or in a different process group or
+    session; then the process is its own root. So GPU processes of a long-lived
+    parent in their own session (jupyter kernels, ...) and siblings with
+    different launchers stay separate jobs.
+    Results are cached as pid -> (start ticks, root) and re-validated by start time.
+    """
+    _, ppid, pgrp, sid, start = read_proc_stat(pid)
+    seen.add(pid)
+    cached = cache.get(pid)
+    if cached and cached[0] == start:
+        seen.add(cached[1])
+        return cached[1]
+
+    uid = proc_uid(pid)
+    root, root_start = pid, start
+    while ppid > 1:
+        try:
+            p_comm, p_ppid, p_pgrp, p_sid, p_start = read_proc_stat(ppid)
+            p_uid = proc_uid(ppid)
+        except (OSError, ValueError, IndexError):
+            break
+        if p_uid != uid or p_comm in SHELL_COMMS or p_comm.startswith("tmux"):
+            break
+        if (p_pgrp, p_sid) != (pgrp, sid):
+            break
+        if ppid not in gpu_pids:
+            # 已经沿 GPU 父进程爬过: 最上面那个 GPU 进程就是启动进程
+            if root == pid:
+                root, root_start = ppid, p_start
+            break
+        # 父进程也在用 GPU (mp.spawn), 继续向上
+        root, root_start = ppid, p_start
+        ppid, pgrp, sid = p_ppid, p_pgrp, p_sid
+
+    cache[pid] = (start, root)
+    cache[root] = (root_start, root)
+    seen.add(root)
+    return root
+
+
+def group_gpu_jobs(data, cache):
+    """Group GPU processes into jobs (one row per multi-rank job).
+
+    cache persists across ticks: {"pids": {pid: (start, root)}, "roots": {root: info}}.
+    """
+    if not data.get('proc_csv') or not os.path.isdir("/proc"):
+        return []
+
+    uuid_to_idx = {}
+    for line in (data.get('gpu_csv') or "").split('\n'):
+        parts = [p.strip() for p in line.split(',')]
+        if len(parts) >= 2:
+            uuid_to_idx[parts[1]] = parts[0]
+
+    if "btime" not in cache:
+        cache["btime"] = boot_time()
+        cache["clk_tck"] = os.sysconf("SC_CLK_TCK")
+    pid_cache = cache.setdefault("pids", {})
+    root_cache = cache.setdefault("roots", {})
+    seen = set()
+
+    procs = []
+    for line in data['proc_csv'].split('\n'):
+        parts = [p.strip() for p in line.split(',')]
+        if len(parts) < 3:
+            continue
+        try:
+            procs.append((parts[0], int(parts[1]), float(parts[2])))
+        except ValueError:
+            continue
+    gpu_pids = {pid for _, pid, _ in procs}
+
+    jobs = {}
+    for gpu_uuid, pid, mem in procs:
+        try:
+            root = resolve_job_root(pid, gpu_pids, pid_cache, seen)
+        except (OSError, ValueError, IndexError):
+            # 进程已退出或在容器内不可见: 单独成组
+            root = pid
+
+        job = jobs.get(root)
+        if job is None:
+            info = root_cache.get(root)
+            root_start = pid_cache.get(root, (None,))[0]
+            if info is None or info["ticks"] != root_start:
+                try:
+                    user = pwd.getpwuid(proc_uid(root)).pw_name
+                except (OSError, KeyError):
+                    user = "Unknown"
+                start = cache["btime"] + root_start / cache["clk_tck"] if root_start is not None else None
+                info = {"ticks": root_start, "user": user, "name": job_name(root), "start": start}
+                root_cache[root] = info
+            job = jobs[root] = {
+                "id": root,
+                "user": info["user"],
+                "name": info["name"],
+                "start": info["start"],
+                "gpus": [],
+                "mem": 0.0,
+            }
+        gpu = uuid_to_idx.get(gpu_uuid, gpu_uuid)
+        if gpu not in job["gpus"]:
+            job["gpus"].append(gpu)
+        job["mem"] += mem
+
+    # 只保留本轮仍存活的进程链, 避免缓存无限增长
+    for p in list(pid_cache):
+        if p not in seen:
+            del pid_cache[p]
+    for r in list(root_cache):
+        if r not in jobs:
+            del root_cache[r]
+
+    return sorted(jobs.values(), key=lambda j: j["id"])
+
+
+def compact_proc_csv(proc_csv):
+    """Drop the directory part of process_name; the job table carries the command once."""
+    lines = []
+    for line in (proc_csv or "").split('\n'):
+        parts = line.split(',', 3)
+        if len(parts) == 4:
+            parts[3] = " " + os.path.basename(parts[3].strip())
+            line = ",".join(parts)
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def parse_gpu_sample(gpu_csv):
+    """Parse gpu_csv into (GPU index list, util list, mem_used list, mem_total list), ordered by index.
+
+    Rows nvidia-smi can't report ([N/A], ERR!) are dropped, so the index list is
+    what ties each value to its GPU.
+    """
+    rows = []
+    for line in (gpu_csv or "").split('\n'):
+        parts = [p.strip() for p in line.split(',')]
+        if len(parts) < 7:
+            continue
+        try:
+            rows.append((int(parts[0]), float(parts[5]), float(parts[3]), float(parts[4])))
+        except ValueError:
+            continue
+    rows.sort()
+    return [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows], [r[3] for r in rows]
+
+
+def load_history(path, hostname):
+    """Load rollup history from disk so restarts keep the existing series."""
+    try:
+        with open(path, "r") as f:
+            history = json.load(f)
+        tiers = history.get("tiers", {})
+        if (history.get("hostname") == hostname and set(tiers) == set(HISTORY_TIERS)
+                and all("idx" in tier for tier in tiers.values())):
+            return history
+    except Exception:
+        pass
+    return {
+        "hostname": hostname,
+        "gpus": [],
+        "mem_total": [],
+        "tiers": {name: {"step": step, "t": [], "n": [], "idx": [], "free": [], "util": [], "mem": []}
+                  for name, (_, step) in HISTORY_TIERS.items()},
+    }
+
+
+def update_history(history, gpu_csv, timestamp):
+    """Fold one sample into every rollup tier (running mean per time bucket)."""
+    idx, util, mem, mem_total = parse_gpu_sample(gpu_csv)
+    if not util:
+        return
+    history["gpus"] = idx
+    history["mem_total"] = mem_total
+    free = float(sum(1 for m in mem if m < FREE_MEM_THRESHOLD))
+
+    for name, (span, step) in HISTORY_TIERS.items():
+        tier = history["tiers"][name]
+        bucket = int(timestamp // step) * step
+        if tier["t"] and tier["t"][-1] == bucket and tier["idx"][-1] != idx:
+            # 桶内 GPU 集合变了 (例如某行 nvidia-smi 输出 [N/A] 被丢弃): 用当前采样重置该桶,
+            # 不能再追加一个相同时间的桶
+            tier["n"][-1] = 1
+            tier["idx"][-1] = list(idx)
+            tier["free"][-1] = free
+            tier["util"][-1] = list(util)
+            tier["mem"][-1] = list(mem)
+        elif tier["t"] and tier["t"][-1] == bucket:
+            n = tier["n"][-1] + 1
+            tier["n"][-1] = n
+            # 内存中保留未取整的均值, 只在写出 history.json 时取整 (见 dump_history),
+            # 否则 n 较大时 (b - a) / n 会被取整吃掉, 桶的值卡在早期采样上
+            tier["free"][-1] += (free - tier["free"][-1]) / n
+            tier["util"][-1] = [a + (b - a) / n for a, b in zip(tier["util"][-1], util)]
+            tier["mem"][-1] = [a + (b - a) / n for a, b in zip(tier["mem"][-1], mem)]
+        else:
+            tier["t"].append(bucket)
+            tier["n"].append(1)
+            tier["idx"].append(list(idx))
+            tier["free"].append(free)
+            tier["util"].append(list(util))
+            tier["mem"].append(list(mem))
+
+        # 丢弃超出保留时长的桶
+        cutoff = bucket - span
+        drop = 0
+        while drop < len(tier["t"]) and tier["t"][drop] <= cutoff:
+            drop += 1
+        if drop:
+            for key in ("t", "n", "idx", "free", "util", "mem"):
+                del tier[key][:drop]
+
+
+def dump_history(history):
+    """Serialize history compactly, rounding the bucket means only on the way out."""
+    tiers = {}
+    for name, tier in history["tiers"].items():
+        tiers[name] = dict(
+            tier,
+            free=[round(v, 2) for v in tier["free"]],
+            util=[[round(v, 1) for v in row] for row in tier["util"]],
+            mem=[[round(v, 1) for v in row] for row in tier["mem"]],
+        )
+    return json.dumps(dict(history, tiers=tiers), separators=(',', ':'))
+
+
+def write_json_atomic(path, data_json):
+    temp_file = path + ".tmp"
+    with open(temp_file, "w") as f:
+        f.write(data_json)
+    os.replace(temp_file, path)
+
+
+def append_record(record_file, sample):
+    """Append one raw sample to the open gzip JSON-lines log (read back by replay.py).
+
+    The log stays one gzip stream for the collector's lifetime; flushing per sample
+    keeps it readable up to the last complete line if the collector is killed.
+    """
+    record_file.write(json.dumps(sample, separators=(',', ':')) + "\n")
+    record_file.flush()
+
+
+def rotate_record_file(path):
+    """Move the record log to <name>.1.gz, replacing the previous rotated log."""
+    base, ext = os.path.splitext(path)
+    os.replace(path, f"{base}.1{ext}")
+
+
+def open_record(path):
+    """Open the record log for this run.
+
+    A log left by an earlier run may end in an unterminated gzip stream (collector
+    killed); appending a new member after it would make the whole file unreadable,
+    so an existing log is rotated away first.
+    """
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        rotate_record_file(path)
+    return gzip.open(path, "at")
+
+
+def rotate_record(record_file, path, max_bytes):
+    """Once the log exceeds max_bytes, rotate it and start a new one."""
+    if max_bytes <= 0 or os.path.getsize(path) < max_bytes:
+        return record_file
+    record_file.close()
+    rotate_record_file(path)
+    return gzip.open(path, "at")
+
+
+def update_gist(gist_id, github_token, hostname, data_json, filename=None):
     """Update a specific file in a GitHub Gist."""
     if not HAS_REQUESTS:
         print("Error: 'requests' module not installed. Run: pip install requests")
@@ -113,7 +453,7 @@ def update_gist(gist_id, github_token, hostname, data_json):
         "Accept": "application/vnd.github.v3+json"
     }
     
-    filename = f"{hostname}.json"
+    filename = filename or f"{hostname}.json"
     payload = {
         "files": {
             filename: {
@@ -174,6 +514,10 @@ def main():
     parser = argparse.ArgumentParser(description="GPU Status Collector")
     parser.add_argument("--interval", type=int, default=5, help="Update interval in seconds")
     parser.add_argument("--output", type=str, default="status.json", help="Output JSON file path (local mode)")
+    parser.add_argument("--history-output", type=str, default=None, help="Rollup history JSON path (default: history.json next to --output)")
+    parser.add_argument("--history-interval", type=int, default=60, help="How often to write/upload the history file, in seconds")
+    parser.add_argument("--record", type=str, default=None, help="Append raw samples to this gzip JSON-lines log (for replay.py)")
+    parser.add_argument("--record-max-mb", type=float, default=100, help="Rotate the record log past this size (0 = never, grows unbounded)")
     parser.add_argument("--gist-id", type=str, default=None, help="GitHub Gist ID for cloud mode")
     parser.add_argument("--github-token", type=str, default=None, help="GitHub token for Gist API")
     parser.add_argument("--create-gist", action="store_true", help="Create a new Gist (requires --github-token)")
@@ -206,10 +550,20 @@ def main():
         if out_dir and not os.path.exists(out_dir):
             os.makedirs(out_dir, exist_ok=True)
 
+    history_path = args.history_output or os.path.join(os.path.dirname(args.output), "history.json")
+    history = load_history(history_path, hostname)
+    last_history_write = 0
+    job_cache = {}
+
     mode_str = f"Gist mode (ID: {args.gist_id})" if use_gist else f"Local mode ({os.path.abspath(args.output)})"
     print(f"Starting GPU Collector on {hostname}...")
     print(f"Mode: {mode_str}")
     print(f"Interval: {args.interval}s")
+    record_file = None
+    record_max_bytes = int(args.record_max_mb * 1024 * 1024)
+    if args.record:
+        record_file = open_record(args.record)
+        print(f"Recording samples to: {os.path.abspath(args.record)}")
 
     while True:
         try:
@@ -217,6 +571,12 @@ def main():
             readable_time = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
             
             gpu_data = get_nvidia_smi_data()
+            try:
+                gpu_data['jobs'] = group_gpu_jobs(gpu_data, job_cache)
+                if gpu_data['jobs']:
+                    gpu_data['proc_csv'] = compact_proc_csv(gpu_data['proc_csv'])
+            except Exception as e:
+                print(f"Job grouping failed: {e}")
             
             output_data = {
                 "hostname": hostname,
@@ -226,18 +586,30 @@ def main():
             }
             
             data_json = json.dumps(output_data, indent=2)
+
+            if record_file:
+                append_record(record_file, {k: v for k, v in output_data.items() if k != "readable_time"})
+                record_file = rotate_record(record_file, args.record, record_max_bytes)
+
+            update_history(history, gpu_data.get('gpu_csv'), timestamp)
+            write_history = timestamp - last_history_write >= args.history_interval
+            if write_history:
+                last_history_write = timestamp
+                history["timestamp"] = timestamp
+                history_json = dump_history(history)
+                write_json_atomic(history_path, history_json)
             
             if use_gist:
                 # Upload to Gist
                 success = update_gist(args.gist_id, args.github_token, hostname, data_json)
                 if success:
                     print(f"[{readable_time}] Updated Gist")
+                if write_history:
+                    update_gist(args.gist_id, args.github_token, hostname, history_json,
+                                filename=f"{hostname}_history.json")
             else:
                 # Write to local file
-                temp_file = args.output + ".tmp"
-                with open(temp_file, "w") as f:
-                    f.write(data_json)
-                os.replace(temp_file, args.output)
+                write_json_atomic(args.output, data_json)
             
         except Exception as e:
             print(f"Error in collection loop: {e}")
@@ -1,12 +1,16 @@
-import streamlit as st
-import streamlit.components.v1 as components
-import pandas as pd
 import time
+
+SCRIPT_START = time.perf_counter()
+
+import streamlit as st
 import os
 import json
-import requests
-from concurrent.futures import ThreadPoolExecutor
-from io import StringIO
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from status_reader import get_local_path, read_gpu_status, parse_data, jobs_frame
+
+# pandas / requests / streamlit.components 较重, 在首次绘制之后按需导入
 
 # ================= 配置区域 =================
 # 监控的主机列表
@@ -19,9 +23,15 @@ try:
 except:
     GIST_ID = os.environ.get("GIST_ID", None)
 
-# 本地模式路径配置
-LOCAL_STATUS_FILE = "status.json"
-NFS_PATH_TEMPLATE = "/export/{host}/junle/monitor/status.json"
+# 本地模式路径配置 (status.json 的路径见 status_reader.py)
+LOCAL_HISTORY_FILE = "history.json"
+NFS_HISTORY_TEMPLATE = "/export/{host}/junle/monitor/history.json"
+
+# 上一次渲染结果的本地快照, 启动时先用它绘制页面
+SNAPSHOT_FILE = ".monitor_snapshot.json"
+
+# 历史趋势图的时间窗口 (对应 gpu_collector.HISTORY_TIERS)
+HISTORY_WINDOWS = ["1h", "24h", "7d"]
 # ===========================================
 
 
@@ -71,9 +81,8 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# 强制页面首次加载时展开侧边栏，避免浏览器保存折叠状态
-components.html(
-    """
+# 强制页面首次加载时展开侧边栏，避免浏览器保存折叠状态 (首次绘制之后再注入)
+SIDEBAR_OPEN_JS = """
     <script>
         const ensureSidebarOpen = () => {
             const doc = window.parent.document;
@@ -88,278 +97,340 @@ components.html(
         setTimeout(ensureSidebarOpen, 100);
         setTimeout(ensureSidebarOpen, 1000);
     </script>
-    """,
-    height=0,
-    width=0,
-)
+    """
 
 
-def read_from_gist(host):
-    """Read status data from GitHub Gist."""
+@st.cache_data(ttl=60, show_spinner=False)
+def read_history(host):
+    """Read the collector's pre-aggregated rollup history for a host (None if unavailable)."""
     try:
-        # Raw Gist URL format
-        url = f"https://gist.githubusercontent.com/raw/{GIST_ID}/{host}.json"
-        response = requests.get(url, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return host, data.get("gpu_csv", ""), data.get("proc_csv", ""), data.get("user_txt", ""), data.get("etime_txt", ""), None
-        else:
-            return host, None, None, None, None, f"Gist fetch failed: {response.status_code}"
-    except Exception as e:
-        return host, None, None, None, None, str(e)
+        if GIST_ID:
+            import requests
 
+            url = f"https://gist.githubusercontent.com/raw/{GIST_ID}/{host.split('.')[0]}_history.json"
+            response = requests.get(url, timeout=10)
+            if response.status_code != 200:
+                return None
+            return response.json()
 
-def read_from_local_file(host):
-    """Read status data from local/NFS file."""
-    import socket
-    current_host = socket.gethostname()
-    host_clean = host.split(".")[0]
-    
-    if host == current_host or host == "localhost":
-        file_path = LOCAL_STATUS_FILE
-    else:
-        file_path = NFS_PATH_TEMPLATE.format(host=host_clean)
-
-    try:
+        file_path = get_local_path(host, LOCAL_HISTORY_FILE, NFS_HISTORY_TEMPLATE)
         if not os.path.exists(file_path):
-            return host, None, None, None, None, f"File not found: {file_path}"
-        
+            return None
         with open(file_path, "r") as f:
-            data = json.load(f)
-            
-        if "error" in data:
-            return host, None, None, None, None, f"Collector Error: {data['error']}"
-
-        return host, data.get("gpu_csv", ""), data.get("proc_csv", ""), data.get("user_txt", ""), data.get("etime_txt", ""), None
-
-    except Exception as e:
-        return host, None, None, None, None, str(e)
-
-
-def read_gpu_status(host):
-    """Read GPU status - auto-selects Gist or local mode."""
-    if GIST_ID:
-        return read_from_gist(host)
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def history_frames(history, window):
+    """Build (util, mem, free) frames for one rollup window, indexed by bucket time (UTC+8)."""
+    import pandas as pd
+
+    tier = (history or {}).get("tiers", {}).get(window)
+    if not tier or not tier.get("t"):
+        return pd.DataFrame(), pd.DataFrame(), pd.Series(dtype=float)
+
+    index = pd.to_datetime(tier["t"], unit="s", utc=True).tz_convert("Asia/Shanghai")
+    # 列按 GPU 编号对齐 (某张卡缺数据时不会把后面的卡左移); 旧格式没有 idx 时按位置
+    idx_rows = tier.get("idx") or [list(range(len(row))) for row in tier["util"]]
+    df_util = pd.DataFrame(
+        [{f"GPU {i}": v for i, v in zip(ids, row)} for ids, row in zip(idx_rows, tier["util"])], index=index
+    )
+    # MiB -> GiB
+    df_mem = pd.DataFrame(
+        [{f"GPU {i}": v / 1024.0 for i, v in zip(ids, row)} for ids, row in zip(idx_rows, tier["mem"])], index=index
+    )
+    columns = [f"GPU {i}" for i in sorted({i for ids in idx_rows for i in ids})]
+    df_util = df_util.reindex(columns=columns)
+    df_mem = df_mem.reindex(columns=columns)
+    free = pd.Series(tier["free"], index=index, dtype=float)
+    # 旧版采集器可能写出重复的桶时间, 只保留最后一个, 否则多主机 concat 会失败
+    keep = ~index.duplicated(keep="last")
+    return df_util[keep], df_mem[keep], free[keep]
+
+
+def render_history():
+    """History charts; only fetched once the user switches them on."""
+    if not st.toggle("Load charts", key="history_on"):
+        st.caption("Charts are loaded on demand to keep the live refresh fast.")
+        return
+
+    import pandas as pd
+
+    window = st.radio("Window", HISTORY_WINDOWS, horizontal=True, key="history_window")
+    with ThreadPoolExecutor(max_workers=len(HOSTS)) as executor:
+        histories = dict(zip(HOSTS, executor.map(read_history, HOSTS)))
+
+    frames = {host: history_frames(h, window) for host, h in histories.items()}
+
+    free_series = {host.split(".")[0]: f[2] for host, f in frames.items() if not f[2].empty}
+    st.markdown("**Cluster free GPUs**")
+    if free_series:
+        df_free = pd.concat(free_series, axis=1).sort_index()
+        st.area_chart(df_free, height=220)
     else:
-        return read_from_local_file(host)
-
-
-def parse_data(gpu_csv, proc_csv, user_txt, etime_txt=""):
-    try:
-        gpu_cols = ["idx", "uuid", "name", "mem_used", "mem_total", "util_gpu", "temp"]
-        df_gpu = pd.read_csv(
-            StringIO(gpu_csv), header=None, names=gpu_cols, skipinitialspace=True
-        )
-        df_gpu["uuid"] = df_gpu["uuid"].astype(str).str.strip()
-    except:
-        df_gpu = pd.DataFrame()
+        st.info("No history available yet")
+
+    tabs = st.tabs([host.split(".")[0] for host in HOSTS])
+    for tab, host in zip(tabs, HOSTS):
+        df_util, df_mem, _ = frames[host]
+        with tab:
+            if df_util.empty:
+                st.caption("No history")
+                continue
+            c1, c2 = st.columns(2)
+            c1.markdown("**Utilization (%)**")
+            c1.line_chart(df_util, height=260)
+            c2.markdown("**Memory used (GiB)**")
+            c2.line_chart(df_mem, height=260)
+
+
+def render_host(slot, result, now_ts):
+    """Render one host card into its slot and return its sidebar summary row."""
+    import pandas as pd
+
+    host, gpu_raw, proc_raw, user_raw, etime_raw, jobs, err = result
+    host_name = host.split(".")[0]
+    total_gpu = 0
+    free_gpu = 0
+    free_gpu_ids = "-"
+    used_gpu_info = "-"
+
+    df_gpu, df_proc = pd.DataFrame(), pd.DataFrame()
+    df_jobs = pd.DataFrame()
+    if not err and gpu_raw:
+        df_gpu, df_proc = parse_data(gpu_raw, proc_raw, user_raw, etime_raw or "")
+        df_jobs = jobs_frame(jobs, now_ts)
+        total_gpu = len(df_gpu)
+        if not df_gpu.empty:
+            free_df = df_gpu[df_gpu["mem_used"] < 500]
+            free_gpu = len(free_df)
+            if not free_df.empty:
+                try:
+                    ids = [str(int(idx)) for idx in free_df["idx"]]
+                except Exception:
+                    ids = [str(idx) for idx in free_df["idx"]]
+                if ids:
+                    free_gpu_ids = "GPU " + ", ".join(ids)
+            used_df = df_gpu[df_gpu["mem_used"] >= 500]
+            if not used_df.empty:
+                lines = []
+                for _, row in used_df.iterrows():
+                    try:
+                        gpu_idx = int(row["idx"])
+                        mem_used_mb = float(row["mem_used"])
+                        mem_total_mb = float(row["mem_total"])
+                    except Exception:
+                        continue
+                    mem_used_g = mem_used_mb / 1024.0 if mem_total_mb > 0 else 0
+                    mem_total_g = mem_total_mb / 1024.0 if mem_total_mb > 0 else 0
+                    line = f"GPU {gpu_idx}: {int(mem_used_g)}G / {int(mem_total_g)}G"
+                    lines.append(line)
+                if lines:
+                    used_gpu_info = "\n".join(lines)
+
+    stats = {
+        "Server": host_name,
+        "Free": f"{free_gpu} / {total_gpu}",
+        "Free GPUs": free_gpu_ids,
+        "Used GPUs": used_gpu_info,
+        "Status": (
+            "🔴 Down"
+            if err
+            else ("🟢 OK" if free_gpu > 0 else "🟡 Full")
+        ),
+    }
 
+    if slot is None:
+        return stats
+    # 先清空 slot, 否则同一轮运行内旧 container 里多出来的元素会残留
+    slot.empty()
+    with slot.container():
+        st.subheader(f"🖥️ {host_name}")
+        if not df_jobs.empty:
+            st.dataframe(df_jobs, hide_index=True, use_container_width=True)
+        with st.expander("GPU 详情", expanded=False):
+            if err:
+                st.error(err)
+            elif not df_gpu.empty:
+                for _, row in df_gpu.iterrows():
+                    try:
+                        gpu_idx = int(row["idx"])
+                        mem_used = float(row["mem_used"])
+                        mem_total = float(row["mem_total"])
+                        util = float(row["util_gpu"])
+                        temp = int(row["temp"])
+                    except:
+                        continue
+
+                    ratio = mem_used / mem_total if mem_total > 0 else 0
+                    gpu_name = (
+                        str(row["name"])
+                        .replace("NVIDIA ", "")
+                        .replace("GeForce ", "")
+                        .replace("RTX ", "")
+                    )
+
+                    with st.container(border=True):
+                        c1, c2 = st.columns([7, 3])
+                        c1.write(f"**GPU {gpu_idx}**: {gpu_name}")
+                        color = "red" if temp > 80 else "grey"
+                        c2.markdown(f":{color}[{temp}°C]")
+
+                        st.progress(
+                            ratio,
+                            text=f"RAM: {int(mem_used)} / {int(mem_total)} MB",
+                        )
+                        st.metric(
+                            "Utility",
+                            f"{int(util)}%",
+                            label_visibility="collapsed",
+                        )
+
+                        if not df_jobs.empty:
+                            gpu_jobs = [
+                                f"{job.get('user', 'Unknown')}: {job.get('name', '')}"
+                                for job in jobs
+                                if str(gpu_idx) in [str(g) for g in job.get("gpus", [])]
+                            ]
+                            st.caption(" · ".join(gpu_jobs) if gpu_jobs else "No active processes")
+                        elif not df_proc.empty and "gpu_idx" in df_proc.columns:
+                            my_procs = df_proc[df_proc["gpu_idx"] == gpu_idx].copy()
+                            if not my_procs.empty:
+                                my_procs["process_name"] = my_procs["process_name"].apply(
+                                    lambda x: x.split("/")[-1] if "/" in x else x
+                                )
+                                display_df = my_procs[["user", "mem_used", "process_name", "run_time"]]
+                                display_df.columns = ["User", "Mem", "Proc", "RunTime"]
+                                st.dataframe(display_df, hide_index=True, use_container_width=True)
+                            else:
+                                st.caption("No active processes")
+                        else:
+                            st.caption("Idle")
+            else:
+                st.warning("No GPU Info")
+
+    return stats
+
+
+def render_status_table(stats_list):
+    if stats_list:
+        headers = ["Server", "Free", "Free GPUs", "Used GPUs", "Status"]
+        md_lines = [
+            "| " + " | ".join(headers) + " |",
+            "|" + " | ".join(["---"] * len(headers)) + "|",
+        ]
+        for row in stats_list:
+            server = row.get("Server", "")
+            free = row.get("Free", "")
+            free_gpus = row.get("Free GPUs", "")
+            used_gpus_raw = row.get("Used GPUs", "-") or "-"
+            used_gpus = used_gpus_raw.replace("\n", "<br>")
+            status = row.get("Status", "")
+            md_lines.append(f"| {server} | {free} | {free_gpus} | {used_gpus} | {status} |")
+        st.markdown("\n".join(md_lines), unsafe_allow_html=True)
+
+
+def load_snapshot():
+    """Load the last rendered results so the first paint doesn't wait on the network."""
     try:
-        if not proc_csv:
-            df_proc = pd.DataFrame()
-        else:
-            proc_cols = ["gpu_uuid", "pid", "mem_used", "process_name"]
-            df_proc = pd.read_csv(
-                StringIO(proc_csv), header=None, names=proc_cols, skipinitialspace=True
-            )
-            df_proc["process_name"] = df_proc["process_name"].astype(str).str.strip()
-            df_proc["gpu_uuid"] = df_proc["gpu_uuid"].astype(str).str.strip()
-            df_proc["pid"] = pd.to_numeric(df_proc["pid"], errors="coerce")
-            df_proc = df_proc.dropna(subset=["pid"])
-            df_proc["pid"] = df_proc["pid"].astype(int)
-    except:
-        df_proc = pd.DataFrame()
-
+        with open(SNAPSHOT_FILE, "r") as f:
+            snapshot = json.load(f)
+        if snapshot.get("hosts") == HOSTS:
+            return snapshot
+    except Exception:
+        pass
+    return None
+
+
+def save_snapshot(stats_list):
+    """Save the sidebar summary rows; every browser session writes through its own temp file."""
+    temp_file = None
     try:
-        if not user_txt:
-            df_user = pd.DataFrame(columns=["pid", "user"])
-        else:
-            df_user = pd.read_csv(
-                StringIO(user_txt), sep=r"\s+", names=["pid", "user"], header=None
-            )
-            df_user["pid"] = pd.to_numeric(df_user["pid"], errors="coerce")
-            df_user = df_user.dropna(subset=["pid"])
-            df_user["pid"] = df_user["pid"].astype(int)
-    except:
-        df_user = pd.DataFrame(columns=["pid", "user"])
-
-    if not df_proc.empty:
-        if not df_user.empty:
-            df_proc = pd.merge(df_proc, df_user, on="pid", how="left")
-            df_proc["user"] = df_proc["user"].fillna("Unknown")
-        else:
-            df_proc["user"] = "Unknown"
-        
-        # 解析进程运行时间
-        try:
-            if etime_txt:
-                df_etime = pd.read_csv(
-                    StringIO(etime_txt), sep=r"\s+", names=["pid", "run_time"], header=None
-                )
-                df_etime["pid"] = pd.to_numeric(df_etime["pid"], errors="coerce")
-                df_etime = df_etime.dropna(subset=["pid"])
-                df_etime["pid"] = df_etime["pid"].astype(int)
-                df_proc = pd.merge(df_proc, df_etime, on="pid", how="left")
-                df_proc["run_time"] = df_proc["run_time"].fillna("-")
-            else:
-                df_proc["run_time"] = "-"
-        except:
-            df_proc["run_time"] = "-"
-
-        if not df_gpu.empty and "uuid" in df_gpu.columns:
-            uuid_map = dict(zip(df_gpu["uuid"], df_gpu["idx"]))
-            df_proc["gpu_idx"] = df_proc["gpu_uuid"].map(uuid_map)
+        fd, temp_file = tempfile.mkstemp(
+            prefix=".monitor_snapshot.", suffix=".tmp", dir=os.path.dirname(os.path.abspath(SNAPSHOT_FILE))
+        )
+        with os.fdopen(fd, "w") as f:
+            json.dump({"time": time.time(), "hosts": HOSTS, "stats": stats_list}, f)
+        os.replace(temp_file, SNAPSHOT_FILE)
+    except Exception as e:
+        print(f"Snapshot save failed: {e}", flush=True)
+        if temp_file and os.path.exists(temp_file):
+            os.remove(temp_file)
 
-    return df_gpu, df_proc
 
+def render_snapshot(slots, snapshot):
+    """Cheap first paint from the snapshot summary rows (no pandas, no I/O to hosts)."""
+    for slot, row in zip(slots, snapshot.get("stats", [])):
+        with slot.container():
+            st.subheader(f"🖥️ {row.get('Server', '')}")
+            st.caption(f"{row.get('Status', '')} · Free {row.get('Free', '')} · {row.get('Free GPUs', '')}")
+            st.caption("Loading live data...")
 
-placeholder = st.empty()
-time_placeholder = st.empty()
 
 # 记录程序启动时间
 from datetime import datetime, timezone, timedelta
 utc8 = timezone(timedelta(hours=8))
 START_TIME = datetime.now(utc8)
 
+# 主机卡片的固定布局: 每台主机一个 slot, 数据到达后逐个替换
+cols = st.columns(3) + st.columns(3)
+host_slots = [col.empty() for col in cols[: len(HOSTS)]]
+time_placeholder = st.empty()
+
+snapshot = load_snapshot()
+if snapshot:
+    render_snapshot(host_slots, snapshot)
+    with status_placeholder.container():
+        render_status_table(snapshot.get("stats", []))
+    snapshot_time = datetime.fromtimestamp(snapshot.get("time", 0), utc8)
+    time_placeholder.caption(f"Snapshot from {snapshot_time.strftime('%m-%d %H:%M:%S')} (UTC+8) | Loading live data...")
+else:
+    for slot, host in zip(host_slots, HOSTS):
+        with slot.container():
+            st.subheader(f"🖥️ {host.split('.')[0]}")
+            st.caption("Loading live data...")
+print(f"[startup] first paint {(time.perf_counter() - SCRIPT_START) * 1000:.0f} ms", flush=True)
+
+with st.expander("📈 History", expanded=False):
+    # 历史文件损坏不能影响下面的实时刷新
+    try:
+        render_history()
+    except Exception as e:
+        st.warning(f"History unavailable: {e}")
+
+import streamlit.components.v1 as components
+components.html(
+    SIDEBAR_OPEN_JS,
+    height=0,
+    width=0,
+)
+
 try:
+    first_refresh = True
     while True:
         # 准备收集统计数据
         print(f"[{time.strftime('%H:%M:%S')}] Refreshing data...", flush=True)
-        stats_list = []
-
-        with placeholder.container():
-            with ThreadPoolExecutor(max_workers=len(HOSTS)) as executor:
-                results = list(executor.map(read_gpu_status, HOSTS))
-
-            cols = st.columns(3) + st.columns(3)
-
-            for i, (host, gpu_raw, proc_raw, user_raw, etime_raw, err) in enumerate(results):
-                host_name = host.split(".")[0]
-                total_gpu = 0
-                free_gpu = 0
-                free_gpu_ids = "-"
-                used_gpu_info = "-"
-
-                df_gpu, df_proc = pd.DataFrame(), pd.DataFrame()
-                if not err and gpu_raw:
-                    df_gpu, df_proc = parse_data(gpu_raw, proc_raw, user_raw, etime_raw or "")
-                    total_gpu = len(df_gpu)
-                    if not df_gpu.empty:
-                        free_df = df_gpu[df_gpu["mem_used"] < 500]
-                        free_gpu = len(free_df)
-                        if not free_df.empty:
-                            try:
-                                ids = [str(int(idx)) for idx in free_df["idx"]]
-                            except Exception:
-                                ids = [str(idx) for idx in free_df["idx"]]
-                            if ids:
-                                free_gpu_ids = "GPU " + ", ".join(ids)
-                        used_df = df_gpu[df_gpu["mem_used"] >= 500]
-                        if not used_df.empty:
-                            lines = []
-                            for _, row in used_df.iterrows():
-                                try:
-                                    gpu_idx = int(row["idx"])
-                                    mem_used_mb = float(row["mem_used"])
-                                    mem_total_mb = float(row["mem_total"])
-                                except Exception:
-                                    continue
-                                mem_used_g = mem_used_mb / 1024.0 if mem_total_mb > 0 else 0
-                                mem_total_g = mem_total_mb / 1024.0 if mem_total_mb > 0 else 0
-                                line = f"GPU {gpu_idx}: {int(mem_used_g)}G / {int(mem_total_g)}G"
-                                lines.append(line)
-                            if lines:
-                                used_gpu_info = "\n".join(lines)
-
-                stats_list.append(
-                    {
-                        "Server": host_name,
-                        "Free": f"{free_gpu} / {total_gpu}",
-                        "Free GPUs": free_gpu_ids,
-                        "Used GPUs": used_gpu_info,
-                        "Status": (
-                            "🔴 Down"
-                            if err
-                            else ("🟢 OK" if free_gpu > 0 else "🟡 Full")
-                        ),
-                    }
-                )
-
-                if i >= len(cols):
-                    continue
-                with cols[i]:
-                    st.subheader(f"🖥️ {host_name}")
-                    with st.expander("GPU 详情", expanded=False):
-                        if err:
-                            st.error(err)
-                        elif not df_gpu.empty:
-                            for _, row in df_gpu.iterrows():
-                                try:
-                                    gpu_idx = int(row["idx"])
-                                    mem_used = float(row["mem_used"])
-                                    mem_total = float(row["mem_total"])
-                                    util = float(row["util_gpu"])
-                                    temp = int(row["temp"])
-                                except:
-                                    continue
-
-                                ratio = mem_used / mem_total if mem_total > 0 else 0
-                                gpu_name = (
-                                    str(row["name"])
-                                    .replace("NVIDIA ", "")
-                                    .replace("GeForce ", "")
-                                    .replace("RTX ", "")
-                                )
-
-                                with st.container(border=True):
-                                    c1, c2 = st.columns([7, 3])
-                                    c1.write(f"**GPU {gpu_idx}**: {gpu_name}")
-                                    color = "red" if temp > 80 else "grey"
-                                    c2.markdown(f":{color}[{temp}°C]")
-
-                                    st.progress(
-                                        ratio,
-                                        text=f"RAM: {int(mem_used)} / {int(mem_total)} MB",
-                                    )
-                                    st.metric(
-                                        "Utility",
-                                        f"{int(util)}%",
-                                        label_visibility="collapsed",
-                                    )
-
-                                    if not df_proc.empty and "gpu_idx" in df_proc.columns:
-                                        my_procs = df_proc[df_proc["gpu_idx"] == gpu_idx].copy()
-                                        if not my_procs.empty:
-                                            my_procs["process_name"] = my_procs["process_name"].apply(
-                                                lambda x: x.split("/")[-1] if "/" in x else x
-                                            )
-                                            display_df = my_procs[["user", "mem_used", "process_name", "run_time"]]
-                                            display_df.columns = ["User", "Mem", "Proc", "RunTime"]
-                                            st.dataframe(display_df, hide_index=True, use_container_width=True)
-                                        else:
-                                            st.caption("No active processes")
-                                    else:
-                                        st.caption("Idle")
-                        else:
-                            st.warning("No GPU Info")
-
+        results = [None] * len(HOSTS)
+        stats_list = [None] * len(HOSTS)
+
+        # 每台主机的数据一到就渲染, 不等最慢的主机
+        with ThreadPoolExecutor(max_workers=len(HOSTS)) as executor:
+            futures = {executor.submit(read_gpu_status, host, GIST_ID): i for i, host in enumerate(HOSTS)}
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                slot = host_slots[i] if i < len(host_slots) else None
+                stats_list[i] = render_host(slot, results[i], time.time())
+
+        stats_list = [row for row in stats_list if row]
         with status_placeholder.container():
-            if stats_list:
-                headers = ["Server", "Free", "Free GPUs", "Used GPUs", "Status"]
-                md_lines = [
-                    "| " + " | ".join(headers) + " |",
-                    "|" + " | ".join(["---"] * len(headers)) + "|",
-                ]
-                for row in stats_list:
-                    server = row.get("Server", "")
-                    free = row.get("Free", "")
-                    free_gpus = row.get("Free GPUs", "")
-                    used_gpus_raw = row.get("Used GPUs", "-") or "-"
-                    used_gpus = used_gpus_raw.replace("\n", "<br>")
-                    status = row.get("Status", "")
-                    md_lines.append(f"| {server} | {free} | {free_gpus} | {used_gpus} | {status} |")
-                st.markdown("\n".join(md_lines), unsafe_allow_html=True)
+            render_status_table(stats_list)
+        save_snapshot(stats_list)
+
+        if first_refresh:
+            first_refresh = False
+            print(f"[startup] live data {(time.perf_counter() - SCRIPT_START) * 1000:.0f} ms", flush=True)
 
         # 使用 UTC+8 时区显示时间和运行时长
         now_utc8 = datetime.now(utc8)
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Replay / Simulation Driver
+
+Feeds recorded collector samples (gpu_collector.py --record) or a synthetic
+cluster trace through the real pipeline, without any GPUs:
+
+  status.json writer -> gist_uploader.read_all_status_files
+                     -> status_reader.read_gpu_status / parse_data (monitor.py's data path)
+
+and reports per-stage timings, so load tests for hundreds of hosts are
+reproducible and hot paths can be profiled.
+
+Usage:
+  # Replay recorded logs at 100x
+  python3 replay.py --log samples_zxcpu1.jsonl.gz --log samples_zxcpu2.jsonl.gz --speed 100
+
+  # 300 synthetic hosts x 8 GPUs, one simulated hour at 1000x
+  python3 replay.py --synthetic-hosts 300 --duration 3600 --speed 1000
+
+  # As fast as possible, with a cProfile report of the hot paths
+  python3 replay.py --synthetic-hosts 300 --duration 600 --speed 0 --profile
+"""
+import argparse
+import cProfile
+import gzip
+import json
+import os
+import pstats
+import random
+import shutil
+import socket
+import statistics
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import gist_uploader
+import status_reader
+from gpu_collector import write_json_atomic
+
+# 合成数据的起始时间 (固定, 保证同一 seed 生成的轨迹完全一致)
+SYNTHETIC_EPOCH = 1767225600
+SYNTHETIC_USERS = [f"user{i:02d}" for i in range(1, 21)]
+SYNTHETIC_JOB_SIZES = [1, 1, 1, 2, 4, 8]
+SYNTHETIC_SCRIPTS = ["train.py", "finetune.py", "eval.py", "serve.py"]
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+STAGES = ["write", "aggregate", "aggregate_encode", "dashboard_read", "dashboard_parse", "refresh_total"]
+
+
+def load_recordings(paths):
+    """Load gzip JSON-lines logs written by gpu_collector.py --record, sorted by time."""
+    samples = []
+    for path in paths:
+        # 采集器总是写 gzip, 按文件头判断而不是按扩展名
+        with open(path, "rb") as f:
+            is_gzip = f.read(2) == GZIP_MAGIC
+        opener = gzip.open if is_gzip else open
+        with opener(path, "rt") as f:
+            try:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        samples.append(json.loads(line))
+            except (EOFError, zlib.error, gzip.BadGzipFile, json.JSONDecodeError) as e:
+                # 采集器被杀掉时日志没有 gzip 结尾, 保留已完整写入的行
+                print(f"{path}: stopped at a damaged record ({e}); kept {len(samples)} samples so far")
+    samples.sort(key=lambda s: s.get("timestamp", 0))
+    return samples
+
+
+def synthetic_trace(n_hosts, gpus, procs_per_gpu, duration, interval, seed):
+    """Yield collector-shaped samples for a simulated cluster, in time order.
+
+    Jobs of 1-8 GPUs arrive on free GPUs and run for an exponentially distributed
+    time; each GPU of a job carries procs_per_gpu processes.
+    """
+    rng = random.Random(seed)
+    hosts = [f"sim{i:03d}" for i in range(1, n_hosts + 1)]
+    # 各台采集器不是同步的, 给每台主机一个固定的相位偏移
+    offsets = {host: rng.uniform(0, interval) for host in hosts}
+    hosts.sort(key=offsets.get)
+    uuids = {
+        host: [f"GPU-{rng.getrandbits(128):032x}" for _ in range(gpus)]
+        for host in hosts
+    }
+    jobs = {host: [] for host in hosts}
+    next_pid = 100000
+
+    for step in range(int(duration // interval)):
+        for host in hosts:
+            t = SYNTHETIC_EPOCH + step * interval + offsets[host]
+            running = [j for j in jobs[host] if j["end"] > t]
+            busy = {g for j in running for g in j["gpus"]}
+            free = [g for g in range(gpus) if g not in busy]
+            if free and rng.random() < 0.05:
+                size = min(len(free), rng.choice(SYNTHETIC_JOB_SIZES))
+                n_procs = size * procs_per_gpu
+                running.append({
+                    "id": next_pid,
+                    "user": rng.choice(SYNTHETIC_USERS),
+                    "name": f"python3 {rng.choice(SYNTHETIC_SCRIPTS)}",
+                    "start": t,
+                    "end": t + rng.expovariate(1 / 7200.0),
+                    "gpus": free[:size],
+                    "pids": list(range(next_pid + 1, next_pid + 1 + n_procs)),
+                    "mem_per_proc": rng.uniform(2000, 70000) / procs_per_gpu,
+                })
+                next_pid += n_procs + 1
+            jobs[host] = running
+            yield synthetic_sample(host, t, gpus, uuids[host], running, procs_per_gpu, rng)
+
+
+def synthetic_sample(host, t, gpus, uuids, running, procs_per_gpu, rng):
+    mem = [0.0] * gpus
+    gpu_rows, proc_rows, user_rows, etime_rows, job_rows = [], [], [], [], []
+    for job in running:
+        etime = status_reader.format_duration(t - job["start"])
+        for i, pid in enumerate(job["pids"]):
+            g = job["gpus"][i // procs_per_gpu]
+            mem[g] += job["mem_per_proc"]
+            proc_rows.append(f"{uuids[g]}, {pid}, {int(job['mem_per_proc'])}, python3")
+            user_rows.append(f"{pid} {job['user']}")
+            etime_rows.append(f"{pid}  {etime}")
+        job_rows.append({
+            "id": job["id"],
+            "user": job["user"],
+            "name": job["name"],
+            "start": job["start"],
+            "gpus": [str(g) for g in job["gpus"]],
+            "mem": round(job["mem_per_proc"] * len(job["pids"]), 1),
+        })
+    for g in range(gpus):
+        util = rng.randint(60, 100) if mem[g] else 0
+        temp = 30 + util // 2
+        gpu_rows.append(f"{g}, {uuids[g]}, NVIDIA A100 80GB PCIe, {int(mem[g])}, 81920, {util}, {temp}")
+    return {
+        "hostname": host,
+        "timestamp": t,
+        "gpu_csv": "\n".join(gpu_rows),
+        "proc_csv": "\n".join(proc_rows),
+        "user_txt": "\n".join(user_rows),
+        "etime_txt": "\n".join(etime_rows),
+        "jobs": job_rows,
+    }
+
+
+def point_pipeline_at(root, hosts):
+    """Redirect the uploader's and dashboard's NFS paths into the replay directory."""
+    template = os.path.join(root, "{host}", "status.json")
+    current = socket.gethostname()
+    gist_uploader.HOSTS = hosts
+    gist_uploader.NFS_PATH_TEMPLATE = template
+    gist_uploader.LOCAL_STATUS_FILE = template.format(host=current)
+    status_reader.NFS_PATH_TEMPLATE = template
+    status_reader.LOCAL_STATUS_FILE = template.format(host=current.split(".")[0])
+    for host in hosts:
+        os.makedirs(os.path.join(root, host), exist_ok=True)
+    return template
+
+
+def run_refresh(hosts, timings):
+    """One uploader + dashboard refresh over the current status files."""
+    start = time.perf_counter()
+    all_data = gist_uploader.read_all_status_files()
+    t1 = time.perf_counter()
+    # 与 gist_uploader.update_gist 相同的编码, 只是不发网络请求
+    payload = {f"{host}.json": json.dumps(data, indent=2) for host, data in all_data.items()}
+    t2 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(hosts)) as executor:
+        results = list(executor.map(status_reader.read_gpu_status, hosts))
+    t3 = time.perf_counter()
+    now_ts = time.time()
+    n_procs = 0
+    for host, gpu_raw, proc_raw, user_raw, etime_raw, jobs, err in results:
+        if err or not gpu_raw:
+            continue
+        _, df_proc = status_reader.parse_data(gpu_raw, proc_raw, user_raw, etime_raw or "")
+        status_reader.jobs_frame(jobs, now_ts)
+        n_procs += len(df_proc)
+    t4 = time.perf_counter()
+
+    timings["aggregate"].append(t1 - start)
+    timings["aggregate_encode"].append(t2 - t1)
+    timings["dashboard_read"].append(t3 - t2)
+    timings["dashboard_parse"].append(t4 - t3)
+    timings["refresh_total"].append(t4 - start)
+    return sum(len(v) for v in payload.values()), n_procs
+
+
+def replay(samples, hosts, template, speed, refresh):
+    """Drive samples through the pipeline, paced at `speed` x simulated time (0 = unpaced)."""
+    timings = {stage: [] for stage in STAGES}
+    stats = {"samples": 0, "refreshes": 0, "max_lag": 0.0, "payload": [], "procs": [], "sim_start": None, "sim_end": None}
+    wall_start = time.perf_counter()
+
+    def pace(sim_t):
+        if speed <= 0:
+            return
+        delay = wall_start + (sim_t - stats["sim_start"]) / speed - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            stats["max_lag"] = max(stats["max_lag"], -delay)
+
+    def refresh_once():
+        payload, n_procs = run_refresh(hosts, timings)
+        stats["refreshes"] += 1
+        stats["payload"].append(payload)
+        stats["procs"].append(n_procs)
+        if stats["refreshes"] % 50 == 0:
+            print(f"[sim +{next_refresh - stats['sim_start']:.0f}s] {stats['refreshes']} refreshes, "
+                  f"last {timings['refresh_total'][-1] * 1000:.1f} ms, {n_procs} procs", flush=True)
+
+    next_refresh = None
+    for sample in samples:
+        t = sample["timestamp"]
+        if stats["sim_start"] is None:
+            stats["sim_start"] = t
+            next_refresh = t + refresh
+        while t >= next_refresh:
+            pace(next_refresh)
+            refresh_once()
+            next_refresh += refresh
+        pace(t)
+
+        start = time.perf_counter()
+        host = sample["hostname"].split(".")[0]
+        write_json_atomic(template.format(host=host), json.dumps(sample, indent=2))
+        timings["write"].append(time.perf_counter() - start)
+        stats["samples"] += 1
+        stats["sim_end"] = t
+
+    if stats["samples"]:
+        refresh_once()
+    stats["wall"] = time.perf_counter() - wall_start
+    return timings, stats
+
+
+def print_report(timings, stats, n_hosts):
+    sim = (stats["sim_end"] or 0) - (stats["sim_start"] or 0)
+    print()
+    print(f"Hosts: {n_hosts}  Samples: {stats['samples']}  Refreshes: {stats['refreshes']}")
+    print(f"Simulated: {sim:.0f}s  Wall: {stats['wall']:.1f}s  Effective speed: {sim / stats['wall'] if stats['wall'] else 0:.0f}x  "
+          f"Max lag: {stats['max_lag'] * 1000:.0f} ms")
+    if stats["procs"]:
+        print(f"GPU processes per refresh: {statistics.median(stats['procs']):.0f} (median)  "
+              f"Gist payload: {statistics.median(stats['payload']) / 1024:.0f} KiB (median)")
+    print(f"{'stage':<18}{'n':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for stage in STAGES:
+        values = sorted(timings[stage])
+        if not values:
+            continue
+        p50 = values[len(values) // 2] * 1000
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))] * 1000
+        print(f"{stage:<18}{len(values):>8}{p50:>10.2f}{p95:>10.2f}{values[-1] * 1000:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GPU Monitor replay / simulation driver")
+    parser.add_argument("--log", action="append", default=[], help="Recorded sample log (repeatable)")
+    parser.add_argument("--synthetic-hosts", type=int, default=0, help="Generate a synthetic trace for N hosts instead")
+    parser.add_argument("--gpus", type=int, default=8, help="GPUs per synthetic host")
+    parser.add_argument("--procs-per-gpu", type=int, default=1, help="Processes per GPU of a synthetic job")
+    parser.add_argument("--duration", type=float, default=3600, help="Simulated seconds of synthetic trace")
+    parser.add_argument("--interval", type=float, default=5, help="Synthetic collector interval in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic trace seed")
+    parser.add_argument("--speed", type=float, default=1, help="Replay speed multiplier, e.g. 1-1000 (0 = as fast as possible)")
+    parser.add_argument("--refresh", type=float, default=10, help="Uploader/dashboard refresh period in simulated seconds")
+    parser.add_argument("--root", type=str, default=None, help="Directory for replayed status files (default: temp dir)")
+    parser.add_argument("--profile", action="store_true", help="Print a cProfile report of the replay")
+    args = parser.parse_args()
+
+    if not args.log and not args.synthetic_hosts:
+        parser.error("need --log or --synthetic-hosts")
+
+    if args.log:
+        samples = load_recordings(args.log)
+        hosts = sorted({s["hostname"].split(".")[0] for s in samples})
+    else:
+        samples = synthetic_trace(args.synthetic_hosts, args.gpus, args.procs_per_gpu,
+                                  args.duration, args.interval, args.seed)
+        hosts = [f"sim{i:03d}" for i in range(1, args.synthetic_hosts + 1)]
+
+    root = args.root or tempfile.mkdtemp(prefix="gpu_replay_")
+    template = point_pipeline_at(root, hosts)
+    speed_str = f"{args.speed:g}x" if args.speed > 0 else "max speed"
+    print(f"Replaying {len(hosts)} hosts into {root} at {speed_str}")
+
+    profiler = cProfile.Profile() if args.profile else None
+    try:
+        if profiler:
+            profiler.enable()
+        timings, stats = replay(samples, hosts, template, args.speed, args.refresh)
+        if profiler:
+            profiler.disable()
+        print_report(timings, stats, len(hosts))
+        if profiler:
+            print()
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+    finally:
+        if not args.root:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Status reading / parsing shared by the dashboard (monitor.py) and the replay driver.
+
+Kept free of streamlit so it can be imported outside `streamlit run`.
+Each read returns (host, gpu_csv, proc_csv, user_txt, etime_txt, jobs, err).
+"""
+import os
+import json
+import socket
+from io import StringIO
+
+# 本地模式路径配置
+LOCAL_STATUS_FILE = "status.json"
+NFS_PATH_TEMPLATE = "/export/{host}/junle/monitor/status.json"
+CURRENT_HOST = socket.gethostname()
+
+
+def read_from_gist(host, gist_id):
+    """Read status data from GitHub Gist."""
+    import requests
+
+    try:
+        # Raw Gist URL format
+        url = f"https://gist.githubusercontent.com/raw/{gist_id}/{host}.json"
+        response = requests.get(url, timeout=10)
+        
+        if response.status_code == 200:
+            data = response.json()
+            return host, data.get("gpu_csv", ""), data.get("proc_csv", ""), data.get("user_txt", ""), data.get("etime_txt", ""), data.get("jobs"), None
+        else:
+            return host, None, None, None, None, None, f"Gist fetch failed: {response.status_code}"
+    except Exception as e:
+        return host, None, None, None, None, None, str(e)
+
+
+def get_local_path(host, local_file, nfs_template):
+    """Resolve the local or NFS path of a collector output file for a host."""
+    host_clean = host.split(".")[0]
+
+    if host == CURRENT_HOST or host == "localhost":
+        return local_file
+    else:
+        return nfs_template.format(host=host_clean)
+
+
+def read_from_local_file(host):
+    """Read status data from local/NFS file."""
+    file_path = get_local_path(host, LOCAL_STATUS_FILE, NFS_PATH_TEMPLATE)
+
+    try:
+        if not os.path.exists(file_path):
+            return host, None, None, None, None, None, f"File not found: {file_path}"
+        
+        with open(file_path, "r") as f:
+            data = json.load(f)
+            
+        if "error" in data:
+            return host, None, None, None, None, None, f"Collector Error: {data['error']}"
+
+        return host, data.get("gpu_csv", ""), data.get("proc_csv", ""), data.get("user_txt", ""), data.get("etime_txt", ""), data.get("jobs"), None
+
+    except Exception as e:
+        return host, None, None, None, None, None, str(e)
+
+
+def read_gpu_status(host, gist_id=None):
+    """Read GPU status - auto-selects Gist or local mode."""
+    if gist_id:
+        return read_from_gist(host, gist_id)
+    else:
+        return read_from_local_file(host)
+
+
+def parse_data(gpu_csv, proc_csv, user_txt, etime_txt=""):
+    import pandas as pd
+
+    try:
+        gpu_cols = ["idx", "uuid", "name", "mem_used", "mem_total", "util_gpu", "temp"]
+        df_gpu = pd.read_csv(
+            StringIO(gpu_csv), header=None, names=gpu_cols, skipinitialspace=True
+        )
+        df_gpu["uuid"] = df_gpu["uuid"].astype(str).str.strip()
+    except:
+        df_gpu = pd.DataFrame()
+
+    try:
+        if not proc_csv:
+            df_proc = pd.DataFrame()
+        else:
+            proc_cols = ["gpu_uuid", "pid", "mem_used", "process_name"]
+            df_proc = pd.read_csv(
+                StringIO(proc_csv), header=None, names=proc_cols, skipinitialspace=True
+            )
+            df_proc["process_name"] = df_proc["process_name"].astype(str).str.strip()
+            df_proc["gpu_uuid"] = df_proc["gpu_uuid"].astype(str).str.strip()
+            df_proc["pid"] = pd.to_numeric(df_proc["pid"], errors="coerce")
+            df_proc = df_proc.dropna(subset=["pid"])
+            df_proc["pid"] = df_proc["pid"].astype(int)
+    except:
+        df_proc = pd.DataFrame()
+
+    try:
+        if not user_txt:
+            df_user = pd.DataFrame(columns=["pid", "user"])
+        else:
+            df_user = pd.read_csv(
+                StringIO(user_txt), sep=r"\s+", names=["pid", "user"], header=None
+            )
+            df_user["pid"] = pd.to_numeric(df_user["pid"], errors="coerce")
+            df_user = df_user.dropna(subset=["pid"])
+            df_user["pid"] = df_user["pid"].astype(int)
+    except:
+        df_user = pd.DataFrame(columns=["pid", "user"])
+
+    if not df_proc.empty:
+        if not df_user.empty:
+            df_proc = pd.merge(df_proc, df_user, on="pid", how="left")
+            df_proc["user"] = df_proc["user"].fillna("Unknown")
+        else:
+            df_proc["user"] = "Unknown"
+        
+        # 解析进程运行时间
+        try:
+            if etime_txt:
+                df_etime = pd.read_csv(
+                    StringIO(etime_txt), sep=r"\s+", names=["pid", "run_time"], header=None
+                )
+                df_etime["pid"] = pd.to_numeric(df_etime["pid"], errors="coerce")
+                df_etime = df_etime.dropna(subset=["pid"])
+                df_etime["pid"] = df_etime["pid"].astype(int)
+                df_proc = pd.merge(df_proc, df_etime, on="pid", how="left")
+                df_proc["run_time"] = df_proc["run_time"].fillna("-")
+            else:
+                df_proc["run_time"] = "-"
+        except:
+            df_proc["run_time"] = "-"
+
+        if not df_gpu.empty and "uuid" in df_gpu.columns:
+            uuid_map = dict(zip(df_gpu["uuid"], df_gpu["idx"]))
+            df_proc["gpu_idx"] = df_proc["gpu_uuid"].map(uuid_map)
+
+    return df_gpu, df_proc
+
+
+def format_duration(seconds):
+    """Format seconds like ps etime: [D-]HH:MM:SS."""
+    seconds = max(int(seconds), 0)
+    days, rem = divmod(seconds, 86400)
+    hours, rem = divmod(rem, 3600)
+    minutes, secs = divmod(rem, 60)
+    text = f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    return f"{days}-{text}" if days else text
+
+
+def jobs_frame(jobs, now_ts):
+    """One row per job from the collector's job table (None for old collectors)."""
+    import pandas as pd
+
+    if not jobs:
+        return pd.DataFrame()
+    rows = []
+    for job in jobs:
+        start = job.get("start")
+        rows.append(
+            {
+                "User": job.get("user", "Unknown"),
+                "GPUs": ",".join(str(g) for g in job.get("gpus", [])),
+                "Mem": f"{job.get('mem', 0) / 1024.0:.1f}G",
+                "Job": job.get("name", ""),
+                "RunTime": format_duration(now_ts - start) if start else "-",
+            }
+        )
+    return pd.DataFrame(rows)